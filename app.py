@@ -1,8 +1,14 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 from datetime import datetime
 
+from dashboard_utils import (
+    DATE_COLS, NEEDED_COLS, FIRMOGRAPHIC_COLS, DEMANDBASE_COLS, PLOTLY_CONFIG,
+    read_table, add_label_columns, page_slice,
+)
+
 # =====================================================
 # PAGE CONFIG
 # =====================================================
@@ -19,11 +25,11 @@ st.title("📊 Citrix Data Dashboard")
 # =====================================================
 @st.cache_data(show_spinner=False)
 def load_data(path):
-    df = pd.read_csv(path)
+    df = read_table(path, NEEDED_COLS)
 
     # Handle date columns flexibly
     date_col = None
-    for col in ["Activity Date", "Activity_DateOnly", "Date"]:
+    for col in DATE_COLS:
         if col in df.columns:
             date_col = col
             break
@@ -34,25 +40,60 @@ def load_data(path):
         st.error("No date column found (expected one of: Activity Date, Activity_DateOnly, Date).")
         st.stop()
 
+    # Sorted by date (NaT last) so date-range filters are a binary search + contiguous slice
     df["__date_col__"] = df[date_col]
-    return df
+    df = df.sort_values("__date_col__", kind="mergesort", ignore_index=True)
+    return add_label_columns(df)
 
 
 @st.cache_data(show_spinner=False)
 def load_demandbase_data(path):
-    df = pd.read_csv(path)
+    df = read_table(path, DEMANDBASE_COLS)
     df.columns = df.columns.str.strip()
+
+    # Index by customer id for hashed firmographic lookups; the unnamed index keeps
+    # merges on the "CustomerId_NAR" column unambiguous
+    if "CustomerId_NAR" in df.columns:
+        df = df.set_index("CustomerId_NAR", drop=False).rename_axis(index=None).sort_index()
     return df
 
 
+@st.cache_data(show_spinner=False)
+def build_merged(data_path, db_path):
+    """Joins Demandbase firmographics onto the main dataset once per pair of paths."""
+    df = load_data(data_path)
+    db_df = load_demandbase_data(db_path)
+
+    # Nothing to join: skip the merge (only the firmographics table reads db_df columns)
+    if df.empty or db_df.empty:
+        return df
+
+    # One firmographics row per customer guarantees the m:1 join can't duplicate activity rows
+    return pd.merge(
+        df, db_df.drop_duplicates("CustomerId_NAR"), on="CustomerId_NAR", how="left",
+        suffixes=("", "_DB"), validate="m:1"
+    )
+
+
+@st.cache_data(show_spinner=False)
+def get_filter_options(data_path, db_path):
+    """Sorted unique Type / Account Name values for the sidebar, computed once per dataset."""
+    merged = build_merged(data_path, db_path)
+    type_options = sorted(merged["Type"].dropna().unique()) if "Type" in merged.columns else None
+    account_options = (
+        sorted(merged["Account Name"].dropna().unique()) if "Account Name" in merged.columns else None
+    )
+    return type_options, account_options
+
+
 # =====================================================
 # FILE PATHS
 # =====================================================
-default_path = "/Applications/WorkDataSets/combined_cleaned_full.csv"
-default_demandbase_path = "/Applications/WorkDataSets/Database/Demandbase_techno_F5_analysis.csv"
+default_path = "/Applications/WorkDataSets/combined_cleaned_full.parquet"
+default_demandbase_path = "/Applications/WorkDataSets/Database/Demandbase_techno_F5_analysis.parquet"
 
-DATA_PATH = st.sidebar.text_input("Enter Main CSV path:", default_path)
-DB_PATH = st.sidebar.text_input("Enter Demandbase CSV path:", default_demandbase_path)
+DATA_PATH = st.sidebar.text_input("Enter Main Parquet (or CSV) path:", default_path)
+DB_PATH = st.sidebar.text_input("Enter Demandbase Parquet (or CSV) path:", default_demandbase_path)
 
 if not DATA_PATH or not DB_PATH:
     st.stop()
@@ -70,7 +111,7 @@ st.success(f"✅ Demandbase dataset loaded: {len(db_df):,} rows, {len(db_df.colu
 # MERGE DATASETS
 # =====================================================
 if "CustomerId_NAR" in df.columns and "CustomerId_NAR" in db_df.columns:
-    merged = pd.merge(df, db_df, on="CustomerId_NAR", how="left", suffixes=("", "_DB"))
+    merged = build_merged(DATA_PATH, DB_PATH)
 else:
     st.error("Could not find matching 'CustomerId_NAR' column in both datasets.")
     st.stop()
@@ -80,14 +121,14 @@ else:
 # =====================================================
 st.sidebar.header("🔍 Filters")
 
-if "Type" in merged.columns:
-    type_options = sorted(merged["Type"].dropna().unique())
+type_options, account_options = get_filter_options(DATA_PATH, DB_PATH)
+
+if type_options is not None:
     selected_types = st.sidebar.multiselect("Activity Type", type_options, default=type_options[:10])
 else:
     selected_types = []
 
-if "Account Name" in merged.columns:
-    account_options = sorted(merged["Account Name"].dropna().unique())
+if account_options is not None:
     selected_accounts = st.sidebar.multiselect("Account", account_options, default=account_options[:10])
 else:
     selected_accounts = []
@@ -96,35 +137,46 @@ min_date = merged["__date_col__"].min()
 max_date = merged["__date_col__"].max()
 start, end = st.sidebar.date_input("Date Range", [min_date, max_date])
 
-filtered = merged.copy()
+# The left merge keeps load_data's date ordering, so the date range is a contiguous slice
+window = merged
+if start and end:
+    dates = merged["__date_col__"]
+    lo = dates.searchsorted(pd.Timestamp(start, tz="UTC"))
+    hi = dates.searchsorted(pd.Timestamp(end, tz="UTC"), side="right")
+    window = merged.iloc[lo:hi]
+
+# Combine the remaining filters into one mask so the window is gathered at most once;
+# with no active filter the slice is used as-is (no copy)
+conditions = []
 
 if selected_types:
-    filtered = filtered[filtered["Type"].isin(selected_types)]
+    conditions.append(window["Type"].isin(selected_types))
 if selected_accounts:
-    filtered = filtered[filtered["Account Name"].isin(selected_accounts)]
-if start and end:
-    filtered = filtered[(filtered["__date_col__"] >= pd.Timestamp(start, tz="UTC")) &
-                        (filtered["__date_col__"] <= pd.Timestamp(end, tz="UTC"))]
+    conditions.append(window["Account Name"].isin(selected_accounts))
+
+filtered = window
+if conditions:
+    filtered = window.loc[np.logical_and.reduce([c.to_numpy(dtype=bool) for c in conditions])]
 
 st.write(f"**Filtered Results:** {len(filtered):,} rows")
-st.dataframe(filtered.head(100))
+preview_cols = [c for c in filtered.columns if not c.startswith("__")]
+st.dataframe(page_slice(filtered, "preview_page", preview_cols))
 
 # =====================================================
 # CHART 1 — TOP 10 ACCOUNTS BY NAMED ENGAGEMENTS
 # =====================================================
 st.subheader("🏆 Top 10 Accounts by Named Engagements")
 
-named = filtered[
-    (filtered["First Name"].notna()) & (filtered["First Name"].str.strip() != "")
-]
+named = filtered[filtered["__has_name__"]]
 
 if not named.empty:
+    # value_counts on a categorical also lists unused categories, so keep counts > 0
     top_accounts = (
-        named.groupby("Account Name")
-        .size()
-        .reset_index(name="Activity Count")
-        .sort_values(by="Activity Count", ascending=False)
+        named["Account Name"].value_counts()
+        .loc[lambda counts: counts > 0]
         .head(10)
+        .rename_axis("Account Name")
+        .reset_index(name="Activity Count")
     )
 
     fig1 = px.bar(
@@ -162,19 +214,21 @@ if "Account Name" in filtered.columns:
     )
 
     account_data = filtered[
-        (filtered["Account Name"] == account_choice) &
-        (filtered["First Name"].notna()) & (filtered["First Name"].str.strip() != "")
+        (filtered["Account Name"] == account_choice) & filtered["__has_name__"]
     ].copy()
 
     if not account_data.empty:
         # Combine Name + Buying Role
-        account_data["Name + Role"] = account_data.apply(
-            lambda x: f"{x['First Name']} {x['Last Name']} - {x['Buying Role']}"
-            if pd.notna(x["Buying Role"]) and str(x["Buying Role"]).strip() != ""
-            else f"{x['First Name']} {x['Last Name']}", axis=1
-        )
+        first = account_data["First Name"].astype("string").fillna("")
+        last = account_data["Last Name"].astype("string").fillna("")
+        role = account_data["Buying Role"].astype("string").fillna("").str.strip()
+        base = first.str.cat(last, sep=" ")
+        account_data["Name + Role"] = np.where(role.ne(""), base.str.cat(role, sep=" - "), base)
 
-        # Timeline scatter
+        # Naive datetimes serialize to Plotly as a typed array
+        account_data["__date_col__"] = account_data["__date_col__"].dt.tz_convert(None)
+
+        # Timeline scatter (WebGL, scales to large accounts)
         fig2 = px.scatter(
             account_data,
             x="__date_col__",
@@ -188,7 +242,8 @@ if "Account Name" in filtered.columns:
                 "__date_col__": "|%Y-%m-%d"
             },
             title=f"Engagement Timeline for {account_choice}",
-            height=600
+            height=600,
+            render_mode="webgl"
         )
 
         fig2.update_layout(
@@ -198,31 +253,20 @@ if "Account Name" in filtered.columns:
             legend_title="Person / Type",
             hovermode="closest"
         )
-        st.plotly_chart(fig2, use_container_width=True)
+        st.plotly_chart(fig2, use_container_width=True, config=PLOTLY_CONFIG)
 
         # =====================================================
         # 🏢 FIRMOGRAPHICS TABLE
         # =====================================================
         st.subheader("🏢 Firmographics")
 
-        firmographic_cols = [
-            "Account Name", "Technographics",
-            "f5_core_adc_matches", "f5_core_adc_summary",
-            "f5_security_matches", "f5_security_summary",
-            "f5_cloud_services_matches", "f5_cloud_services_summary",
-            "complementary_cloud_matches", "complementary_cloud_summary",
-            "complementary_identity_matches", "complementary_identity_summary",
-            "complementary_workspace_matches", "complementary_workspace_summary"
-        ]
-
         if "CustomerId_NAR" in account_data.columns:
-            firmographics = db_df[db_df["CustomerId_NAR"].isin(account_data["CustomerId_NAR"].unique())][
-                [c for c in firmographic_cols if c in db_df.columns]
-            ]
+            ids = db_df.index.intersection(account_data["CustomerId_NAR"].unique())
+            firmographics = db_df.loc[ids, [c for c in FIRMOGRAPHIC_COLS if c in db_df.columns]]
 
             if not firmographics.empty:
                 st.dataframe(
-                    firmographics.style.set_properties(**{
+                    page_slice(firmographics, "firmographics_page").style.set_properties(**{
                         'white-space': 'pre-wrap',
                         'word-wrap': 'break-word'
                     }),
@@ -1,10 +1,17 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import os
+import html
 from datetime import datetime
 import re
 
+from dashboard_utils import (
+    DATE_COLS, NEEDED_COLS, FIRMOGRAPHIC_COLS, DEMANDBASE_COLS, PLOTLY_CONFIG,
+    read_table, add_label_columns, page_slice,
+)
+
 # =====================================================
 # PAGE CONFIG
 # =====================================================
@@ -17,43 +24,22 @@ st.set_page_config(
 st.title("Citrix Data Dashboard")
 
 # =====================================================
-# FILE LOAD — DIRECTLY FROM GITHUB (NO UPLOADS NEEDED)
+# CONTACT COLUMNS
 # =====================================================
+CONTACT_KEY_COLS = ["party_number", "Party_Number", "party_id", "Party_ID"]
 
-st.sidebar.header("🌐 Loading Data from GitHub")
-
-@st.cache_data
-def load_csv_from_github(url):
-    try:
-        return pd.read_csv(url, encoding='latin1')
-    except UnicodeDecodeError:
-        return pd.read_csv(url, encoding='ISO-8859-1')
-    except Exception as e:
-        st.error(f"❌ Error loading {url}: {e}")
-        st.stop()
-
-# ---- Your actual dataset URLs ----
-main_url = "https://raw.githubusercontent.com/Guitarjakie98/BuyingCenter/main/combined_DataStore%20copy.csv"
-demand_url = "https://raw.githubusercontent.com/Guitarjakie98/BuyingCenter/main/Demandbase_techno_F5_analysis.parquet%20copy"
-contacts_url = "https://raw.githubusercontent.com/Guitarjakie98/BuyingCenter/main/bqcontactdata%20copy.csv"
-
-# ---- Load datasets ----
-df = load_csv_from_github(main_url)
-db_df = load_csv_from_github(demand_url)
-contacts_df = load_csv_from_github(contacts_url)
-
-st.sidebar.success("✅ Files loaded automatically from GitHub!")
+CONTACT_COLS = [*CONTACT_KEY_COLS, "party_unique_name", "job_title", "sales_affinity_code"]
 
 # =====================================================
 # FILE PATHS
 # =====================================================
-default_path = "/Applications/WorkDataSets/combined_cleaned_full.csv"
-default_demandbase_path = "/Applications/WorkDataSets/Database/Demandbase_techno_F5_analysis.csv"
-default_contacts_path = "/Applications/WorkDataSets/Database/bqcontactdata.csv"
+default_path = "/Applications/WorkDataSets/combined_cleaned_full.parquet"
+default_demandbase_path = "/Applications/WorkDataSets/Database/Demandbase_techno_F5_analysis.parquet"
+default_contacts_path = "/Applications/WorkDataSets/Database/bqcontactdata.parquet"
 
-DATA_PATH = st.sidebar.text_input("Enter Main CSV path:", default_path)
-DB_PATH = st.sidebar.text_input("Enter Demandbase CSV path:", default_demandbase_path)
-CONTACT_PATH = st.sidebar.text_input("Enter Contact CSV path:", default_contacts_path)
+DATA_PATH = st.sidebar.text_input("Enter Main Parquet (or CSV) path:", default_path)
+DB_PATH = st.sidebar.text_input("Enter Demandbase Parquet (or CSV) path:", default_demandbase_path)
+CONTACT_PATH = st.sidebar.text_input("Enter Contact Parquet (or CSV) path:", default_contacts_path)
 
 if not DATA_PATH or not DB_PATH or not CONTACT_PATH:
     st.stop()
@@ -62,14 +48,38 @@ if not DATA_PATH or not DB_PATH or not CONTACT_PATH:
 # LOAD DATA — AUTO-DETECT LOCAL OR GITHUB SOURCE
 # ============================================================
 
-def load_data_auto(path):
-    """Loads CSVs from either GitHub URLs or local paths safely."""
+ID_PREFIX_RE = re.compile(r"H-CIT-|H-|CIT-")
+
+def normalize_ids(ids):
+    """Strips, upper-cases and drops H-CIT-/H-/CIT- prefixes in one vectorized pass."""
+    return (
+        ids.astype("string")
+        .str.strip()
+        .str.upper()
+        .str.replace(ID_PREFIX_RE, "", regex=True)
+    )
+
+@st.cache_data(show_spinner=False)
+def load_data_auto(path, columns, id_cols=(), clean_col=None, index_col=None):
+    """Loads Parquet (column-pruned) or CSV from either GitHub URLs or local paths safely.
+
+    Header normalization, the `clean_col` join key (normalized from the first of
+    `id_cols` present) and the optional `index_col` lookup index are computed here,
+    once per file, instead of on every rerun.
+    """
     try:
+        df = read_table(path, columns)
+        df.columns = df.columns.str.strip()
+        id_col = next((c for c in id_cols if c in df.columns), None)
+        if clean_col and id_col:
+            df[clean_col] = normalize_ids(df[id_col])
+        df = add_label_columns(df)
+        # Index for hashed lookups, kept as a column too (unnamed index, like app.py)
+        if index_col and index_col in df.columns:
+            df = df.set_index(index_col, drop=False).rename_axis(index=None).sort_index()
         if path.startswith("http"):
-            df = pd.read_csv(path)
             msg = f"Loaded from GitHub: {path}"
         else:
-            df = pd.read_csv(path)
             msg = f"Loaded from local file: {path}"
         return df, msg
     except Exception as e:
@@ -77,16 +87,9 @@ def load_data_auto(path):
         st.stop()
 
 # Load all datasets
-df, df_msg = load_data_auto(DATA_PATH)
-db_df, db_msg = load_data_auto(DB_PATH)
-contacts_df, contacts_msg = load_data_auto(CONTACT_PATH)
-
-# =====================================================
-# NORMALIZE COLUMN HEADERS
-# =====================================================
-df.columns = df.columns.str.strip()
-db_df.columns = db_df.columns.str.strip()
-contacts_df.columns = contacts_df.columns.str.strip()
+df, df_msg = load_data_auto(DATA_PATH, NEEDED_COLS, ("CustomerId_NAR",), "CustomerId_NAR_clean")
+db_df, db_msg = load_data_auto(DB_PATH, DEMANDBASE_COLS, index_col="CustomerId_NAR")
+contacts_df, contacts_msg = load_data_auto(CONTACT_PATH, CONTACT_COLS, CONTACT_KEY_COLS, "party_number_clean")
 
 # =====================================================
 # ACCOUNT DROPDOWN
@@ -113,15 +116,26 @@ st.session_state["account_choice"] = account_choice
 # =====================================================
 # FILTER DATA FOR SELECTED ACCOUNT
 # =====================================================
-account_data = df[df["Account Name"] == account_choice].copy()
+@st.cache_resource(show_spinner=False)
+def account_groups(path, _df):
+    """Groups the main dataset by account once per data path; `_df` is not hashed."""
+    return _df.groupby("Account Name", sort=False, observed=True)
+
+try:
+    account_data = account_groups(DATA_PATH, df).get_group(account_choice).copy()
+except KeyError:
+    account_data = df.iloc[0:0].copy()
 if account_data.empty:
     st.warning("No data available for this account.")
     st.stop()
 
 # Normalize date columns
-for col in ["Activity Date", "Activity_DateOnly", "Date"]:
+for col in DATE_COLS:
     if col in account_data.columns:
-        account_data["__date_col__"] = pd.to_datetime(account_data[col], errors="coerce", utc=True)
+        # Naive UTC datetimes serialize to Plotly as a typed array
+        account_data["__date_col__"] = (
+            pd.to_datetime(account_data[col], errors="coerce", utc=True).dt.tz_convert(None)
+        )
         break
 
 # =====================================================
@@ -129,14 +143,14 @@ for col in ["Activity Date", "Activity_DateOnly", "Date"]:
 # =====================================================
 st.subheader(f"Engagement Timeline for {account_choice}")
 
-named = account_data[(account_data["First Name"].notna()) & (account_data["First Name"].str.strip() != "")]
+named = account_data[account_data["__has_name__"]]
 
 if not named.empty:
-    named["Name + Role"] = named.apply(
-        lambda x: f"{x['First Name']} {x['Last Name']} - {x['Buying Role']}"
-        if pd.notna(x["Buying Role"]) and str(x["Buying Role"]).strip() != ""
-        else f"{x['First Name']} {x['Last Name']}", axis=1
-    )
+    first = named["First Name"].astype("string").fillna("")
+    last = named["Last Name"].astype("string").fillna("")
+    role = named["Buying Role"].astype("string").fillna("").str.strip()
+    base = first.str.cat(last, sep=" ")
+    named["Name + Role"] = np.where(role.ne(""), base.str.cat(role, sep=" - "), base)
 
     fig = px.scatter(
         named,
@@ -150,7 +164,8 @@ if not named.empty:
             "__date_col__": "|%Y-%m-%d"
         },
         title=f"Engagement Timeline for {account_choice}",
-        height=600
+        height=600,
+        render_mode="webgl"
     )
 
     fig.update_layout(
@@ -160,7 +175,7 @@ if not named.empty:
         legend_title="Person / Type",
         hovermode="closest"
     )
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(fig, use_container_width=True, config=PLOTLY_CONFIG)
 else:
     st.info("No named engagements found for this account.")
 
@@ -170,20 +185,12 @@ else:
 st.subheader("Firmographics")
 
 if "CustomerId_NAR" in account_data.columns and "CustomerId_NAR" in db_df.columns:
-    firmographics = db_df[db_df["CustomerId_NAR"].isin(account_data["CustomerId_NAR"].unique())]
+    ids = db_df.index.intersection(account_data["CustomerId_NAR"].unique())
+    firmographics = db_df.loc[ids]
     if not firmographics.empty:
-        cols = [
-            "Account Name", "Technographics",
-            "f5_core_adc_matches", "f5_core_adc_summary",
-            "f5_security_matches", "f5_security_summary",
-            "f5_cloud_services_matches", "f5_cloud_services_summary",
-            "complementary_cloud_matches", "complementary_cloud_summary",
-            "complementary_identity_matches", "complementary_identity_summary",
-            "complementary_workspace_matches", "complementary_workspace_summary"
-        ]
-        cols = [c for c in cols if c in firmographics.columns]
+        cols = [c for c in FIRMOGRAPHIC_COLS if c in firmographics.columns]
         st.dataframe(
-            firmographics[cols].style.set_properties(**{
+            page_slice(firmographics, "firmographics_page", cols).style.set_properties(**{
                 'white-space': 'pre-wrap',
                 'word-wrap': 'break-word'
             }),
@@ -197,33 +204,14 @@ else:
 # =====================================================
 # CONTACTS JOIN — SAFE NORMALIZATION
 # =====================================================
-possible_keys = ["party_number", "Party_Number", "party_id", "Party_ID"]
+possible_keys = CONTACT_KEY_COLS
 contact_key = next((k for k in possible_keys if k in contacts_df.columns), None)
 
 if contact_key is None:
     st.error(f"❌ Could not find any of these join keys in contacts dataset: {possible_keys}")
     st.stop()
 
-def normalize_id(x):
-    if pd.isna(x):
-        return None
-    return (
-        str(x)
-        .strip()
-        .upper()
-        .replace("H-CIT-", "")
-        .replace("H-", "")
-        .replace("CIT-", "")
-    )
-
-contacts_df["party_number_clean"] = contacts_df[contact_key].apply(normalize_id)
-df["CustomerId_NAR_clean"] = df["CustomerId_NAR"].apply(normalize_id)
-
-matching_ids = (
-    df.loc[df["Account Name"] == account_choice, "CustomerId_NAR_clean"]
-    .dropna()
-    .unique()
-)
+matching_ids = account_data["CustomerId_NAR_clean"].dropna().unique()
 
 #st.write("🧩 Debug — Normalized matching IDs:", matching_ids[:10])
 #st.write("🧩 Debug — Normalized party numbers:", contacts_df["party_number_clean"].dropna().unique()[:10])
@@ -235,33 +223,32 @@ account_contacts = contacts_df[
 # =====================================================
 # DERIVE ENGAGEMENT + COLOR SIGNALS
 # =====================================================
-engaged_names = set(
-    zip(
-        named["First Name"].fillna("").str.strip().str.lower(),
-        named["Last Name"].fillna("").str.strip().str.lower(),
-    )
-)
-
-def has_engaged_match(row):
-    parts = str(row.get("party_unique_name", "")).strip().split()
-    if len(parts) >= 2:
-        first, last = parts[0].lower(), parts[-1].lower()
-        return (first, last) in engaged_names
-    return False
-
-account_contacts["is_engaged"] = account_contacts.apply(has_engaged_match, axis=1)
+engaged_idx = pd.MultiIndex.from_arrays([
+    named["First Name"].astype("string").fillna("").str.strip().str.lower(),
+    named["Last Name"].astype("string").fillna("").str.strip().str.lower(),
+])
+
+def flag_engaged(names, engaged_idx):
+    """Vectorized check of each contact's (first, last) name pair against the engaged pairs."""
+    parts = names.astype("string").str.strip().str.lower().str.split()
+    has_pair = parts.str.len().fillna(0).ge(2).to_numpy()
+    pairs = pd.MultiIndex.from_arrays([parts.str[0], parts.str[-1]])
+    return has_pair & pairs.isin(engaged_idx)
+
+if "party_unique_name" in account_contacts.columns:
+    account_contacts["is_engaged"] = flag_engaged(account_contacts["party_unique_name"], engaged_idx)
+else:
+    account_contacts["is_engaged"] = False
 
 if "sales_affinity_code" not in account_contacts.columns:
     account_contacts["sales_affinity_code"] = ""
 
-def get_status_color(row):
-    if str(row["sales_affinity_code"]).strip():
-        return "purple"
-    if row["is_engaged"]:
-        return "yellow"
-    return "red"
-
-account_contacts["status_color"] = account_contacts.apply(get_status_color, axis=1)
+affinity = account_contacts["sales_affinity_code"].astype("string").fillna("").str.strip()
+account_contacts["status_color"] = np.select(
+    [affinity.ne("").to_numpy(dtype=bool), account_contacts["is_engaged"].to_numpy(dtype=bool)],
+    ["purple", "yellow"],
+    default="red",
+)
 
 # =====================================================
 # FILTER CONTACTS AND DISPLAY
@@ -276,7 +263,7 @@ color_filter = st.sidebar.multiselect(
 )
 search_query = st.sidebar.text_input("🔎 Search name").strip().lower()
 
-filtered_contacts = account_contacts[account_contacts["status_color"].isin(color_filter)].copy()
+filtered_contacts = account_contacts[account_contacts["status_color"].isin(color_filter)]
 
 if search_query and "party_unique_name" in filtered_contacts.columns:
     filtered_contacts = filtered_contacts[
@@ -287,31 +274,6 @@ if filtered_contacts.empty:
     st.info(f"No contacts found for {account_choice}.")
     st.stop()
 
-# =====================================================
-# FLAG ENGAGED CONTACTS
-# =====================================================
-
-# Create a set of engaged (first, last) pairs from your timeline dataset
-engaged_pairs = set(
-    zip(
-        named["First Name"].fillna("").str.strip().str.lower(),
-        named["Last Name"].fillna("").str.strip().str.lower()
-    )
-)
-
-# Function to test if a contact appears in the engagement dataset
-def check_engaged(name):
-    if not isinstance(name, str):
-        return False
-    parts = name.strip().split()
-    if len(parts) < 2:
-        return False
-    first, last = parts[0].lower(), parts[-1].lower()
-    return (first, last) in engaged_pairs
-
-# Apply the match
-filtered_contacts["is_engaged"] = filtered_contacts["party_unique_name"].apply(check_engaged)
-
 # =====================================================
 # DISPLAY CONTACT CARDS
 # =====================================================
@@ -414,35 +376,33 @@ st.markdown("""
 # --- Normalize empty strings and "nan" to NaN so logic catches them ---
 filtered_contacts = filtered_contacts.replace(["", " ", "nan", "None"], pd.NA)
 
-# Build cards as a single flat string (no indentation!)
-cards_html = "<div class='contact-container'>"
-
-for _, row in filtered_contacts.iterrows():
-    name = row.get("party_unique_name", "Unknown")
-    title = row.get("job_title", "")
-    affinity = row.get("sales_affinity_code", "")
-
-    # --- Color logic based on data completeness and engagement ---
-    if pd.isna(title) or pd.isna(affinity):
-        color = "gray"                # Missing info
-    elif row.get("is_engaged", False):
-        color = "yellow"              # Engaged
-    else:
-        color = "purple"              # Default / complete
-
-    engaged_dot = "<div class='engaged-dot'></div>" if row.get("is_engaged", False) else ""
-
-    # No indentation, otherwise Streamlit escapes the HTML
-    cards_html += f"""
-    <div class='contact-card {color}'>
-        {engaged_dot}
-        <div>{name}</div>
-        <div class='contact-title'>{title or ''}</div>
-        <div class='contact-affinity'>{affinity or ''}</div>
-    </div>
-    """
+# --- Color logic based on data completeness and engagement ---
+cards = filtered_contacts.reindex(
+    columns=["party_unique_name", "job_title", "sales_affinity_code", "is_engaged"]
+)
+cards["party_unique_name"] = cards["party_unique_name"].fillna("Unknown")
+missing_info = cards["job_title"].isna() | cards["sales_affinity_code"].isna()
+cards["card_color"] = np.select(
+    [missing_info.to_numpy(dtype=bool), cards["is_engaged"].fillna(False).to_numpy(dtype=bool)],
+    ["gray", "yellow"],       # Missing info / Engaged
+    default="purple",         # Default / complete
+)
 
-cards_html += "</div>"
+def card_text(value):
+    return "" if pd.isna(value) else html.escape(str(value))
+
+# Build cards as a single flat string (no indentation, otherwise Streamlit escapes the HTML)
+engaged_dot = "<div class='engaged-dot'></div>"
+card_parts = ["<div class='contact-container'>"]
+card_parts.extend(
+    f"<div class='contact-card {color}'>{engaged_dot if engaged else ''}"
+    f"<div>{card_text(name)}</div>"
+    f"<div class='contact-title'>{card_text(title)}</div>"
+    f"<div class='contact-affinity'>{card_text(affinity)}</div></div>"
+    for name, title, affinity, engaged, color in cards.itertuples(index=False, name=None)
+)
+card_parts.append("</div>")
+cards_html = "".join(card_parts)
 
 # Render
 st.markdown(cards_html, unsafe_allow_html=True)
@@ -0,0 +1,50 @@
+"""Converts the dashboard's source CSVs to zstd-compressed Parquet.
+
+Run once offline, then point the dashboard path inputs at the .parquet files:
+
+    python convert_to_parquet.py [CSV_PATH ...]
+"""
+import argparse
+from pathlib import Path
+
+import pandas as pd
+
+# =====================================================
+# DEFAULT SOURCES
+# =====================================================
+DEFAULT_CSV_PATHS = [
+    "/Applications/WorkDataSets/combined_cleaned_full.csv",
+    "/Applications/WorkDataSets/Database/Demandbase_techno_F5_analysis.csv",
+    "/Applications/WorkDataSets/Database/bqcontactdata.csv",
+]
+
+
+def convert(csv_path):
+    """Writes `csv_path` next to itself as .parquet and returns (output path, row count)."""
+    csv_path = Path(csv_path)
+    try:
+        df = pd.read_csv(csv_path, low_memory=False)
+    except UnicodeDecodeError:
+        df = pd.read_csv(csv_path, encoding="latin1", low_memory=False)
+
+    # Mixed-type object columns can't be typed by Arrow; store them as strings
+    obj_cols = df.columns[df.dtypes == object]
+    df[obj_cols] = df[obj_cols].astype("string")
+
+    out_path = csv_path.with_suffix(".parquet")
+    df.to_parquet(out_path, compression="zstd", index=False)
+    return out_path, len(df)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("csv_paths", nargs="*", default=DEFAULT_CSV_PATHS)
+    args = parser.parse_args()
+
+    for path in args.csv_paths:
+        out_path, rows = convert(path)
+        print(f"✅ {path} -> {out_path} ({rows:,} rows)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Loaders, column whitelists and display helpers shared by app.py and app3.py."""
+from urllib.request import urlopen
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import streamlit as st
+
+# =====================================================
+# COLUMN WHITELISTS
+# =====================================================
+DATE_COLS = ["Activity Date", "Activity_DateOnly", "Date"]
+
+NEEDED_COLS = [
+    "Account Name", "First Name", "Last Name", "Buying Role",
+    "Type", "Details", "CustomerId_NAR", *DATE_COLS
+]
+
+FIRMOGRAPHIC_COLS = [
+    "Account Name", "Technographics",
+    "f5_core_adc_matches", "f5_core_adc_summary",
+    "f5_security_matches", "f5_security_summary",
+    "f5_cloud_services_matches", "f5_cloud_services_summary",
+    "complementary_cloud_matches", "complementary_cloud_summary",
+    "complementary_identity_matches", "complementary_identity_summary",
+    "complementary_workspace_matches", "complementary_workspace_summary"
+]
+
+DEMANDBASE_COLS = ["CustomerId_NAR", *FIRMOGRAPHIC_COLS]
+
+# Low-cardinality labels that are filtered / grouped on repeatedly
+CATEGORY_COLS = ["Type", "Account Name", "Buying Role", "First Name"]
+
+# WebGL scatter charts stay interactive and resize with the layout
+PLOTLY_CONFIG = {"staticPlot": False, "responsive": True}
+
+# Decode Arrow strings straight into pyarrow-backed pandas strings
+ARROW_STRING_TYPES = {
+    pa.string(): pd.StringDtype("pyarrow"),
+    pa.large_string(): pd.StringDtype("pyarrow"),
+}
+
+# =====================================================
+# LOAD HELPERS
+# =====================================================
+def read_parquet_columns(source, columns):
+    """Reads only the whitelisted columns (matched on stripped headers) from a Parquet file or URL."""
+    if source.startswith("http"):
+        with urlopen(source) as resp:
+            source = pa.BufferReader(resp.read())
+    pf = pq.ParquetFile(source)
+    present = [c for c in pf.schema_arrow.names if c.strip() in columns]
+    return pf.read(columns=present).to_pandas(types_mapper=ARROW_STRING_TYPES.get)
+
+
+def csv_usecols(columns):
+    """usecols callable that keeps the whitelisted columns (matched on stripped headers)."""
+    return lambda c: c.strip() in columns
+
+
+def downcast_numeric(df):
+    """Shrinks integer columns to the smallest integer dtype, and float columns to float32
+    only when every value round-trips exactly (to_numeric's float downcast is approximate)."""
+    for col in df.select_dtypes("integer").columns:
+        df[col] = pd.to_numeric(df[col], downcast="integer")
+    for col in df.select_dtypes("float64").columns:
+        as_float32 = df[col].astype("float32")
+        if ((as_float32 == df[col]) | df[col].isna()).all():
+            df[col] = as_float32
+    return df
+
+
+def read_table(path, columns):
+    """Reads Parquet with column pruning; falls back to CSV for legacy paths."""
+    if ".parquet" in path:
+        df = read_parquet_columns(path, columns)
+    else:
+        df = pd.read_csv(path, usecols=csv_usecols(columns))
+    return downcast_numeric(df)
+
+
+def add_label_columns(df):
+    """Adds the `__has_name__` mask and converts CATEGORY_COLS to categoricals, once per load."""
+    # Non-blank first name marks a "named" engagement
+    if "First Name" in df.columns:
+        df["__has_name__"] = df["First Name"].astype("string").fillna("").str.strip().ne("").astype(bool)
+
+    for col in CATEGORY_COLS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    return df
+
+
+# =====================================================
+# DISPLAY HELPERS
+# =====================================================
+def page_slice(df, key, columns=None, page_size=50):
+    """Returns the page of `df` picked by a page selector, so only those rows are sent to the browser.
+
+    The selector is only drawn when there is more than one page.
+    """
+    n_pages = (len(df) + page_size - 1) // page_size
+    if n_pages > 1:
+        page = st.number_input(f"Page (of {n_pages:,})", min_value=1, max_value=n_pages, value=1, step=1, key=key)
+        df = df.iloc[(page - 1) * page_size:page * page_size]
+    return df if columns is None else df[columns]